@@ -1,5 +1,7 @@
 import os
-from multiprocessing import Process, Queue
+from multiprocessing import Pool, Process, Queue
+
+RESULT_TIMEOUT = 30  # seconds to wait for each worker result
 
 
 def info(title):
@@ -20,6 +22,10 @@ def fcalc(x, queue):
     queue.put(result)
 
 
+def fcalc_pure(x):
+    return x * x
+
+
 if __name__ == "__main__":
     # auto create process
     tasks = [1, 2, 3, 4, 5]
@@ -31,15 +37,17 @@ if __name__ == "__main__":
         processes.append(process)
         process.start()
 
-    for process in processes:
-        process.join()
-
+    # drain one result per task before joining; a child blocks on exit until
+    # its queued data is flushed, so joining first can deadlock
     results = []
-    while not queue.empty():
-        results.append(queue.get())
+    for _ in range(len(tasks)):
+        results.append(queue.get(timeout=RESULT_TIMEOUT))
         print(f"result: {results[-1]}")
     print(f"results: {results}")
 
+    for process in processes:
+        process.join()
+
     # simple parallel using process
     p1 = Process(target=f, args=("bob",))
     p2 = Process(target=f, args=("miaomiao",))
@@ -48,6 +56,6 @@ if __name__ == "__main__":
     p1.join()
     p2.join()
 
-    # parallel using pool
-    # with Pool(5) as p:
-    # 	print(p.map(fcalc, [1,2,3], queue))
+    # parallel using pool, workers are spawned once and reused for every task
+    with Pool(len(tasks)) as pool:
+        print(f"pool results: {pool.map(fcalc_pure, tasks)}")
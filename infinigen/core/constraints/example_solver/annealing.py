@@ -199,9 +199,8 @@ class SimulatedAnnealingSolver:
     ) -> typing.Tuple["Move", "evaluate.EvalResult", int]:
         move_gen = propose_func(consgraph, state, filter_domain, temp)
 
-        print("\nmove_gen: \n")
-        print(f"\ntype(move_gen): {type(move_gen)}\n")
-        logger.debug(f"\nmove_gen: {move_gen}\n")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"{move_gen=} {type(move_gen)=}")
 
         move = None
         retry = None
@@ -5,11 +5,13 @@
 # Authors: Alexander Raistrick, Karhan Kayan
 
 import logging
+import math
 import os
-import random
+import sys
 import time
 import typing
-from multiprocessing import Process, Queue  # noqa: F401
+from dataclasses import asdict, dataclass
+from multiprocessing.shared_memory import ShareableList
 from pprint import pprint
 
 import bpy
@@ -29,7 +31,59 @@ from .state_def import State
 
 logger = logging.getLogger(__name__)
 
-BPY_GARBAGE_COLLECT_FREQUENCY = 20  # every X optim steps
+BPY_GARBAGE_COLLECT_FREQUENCY = 20  # at most every X optim steps
+BPY_GARBAGE_COLLECT_MAX_INTERVAL = 200  # at least every X optim steps
+BPY_GARBAGE_COLLECT_TIME_BUDGET = 0.05  # target fraction of optim time spent in gc
+RANDOM_BUFFER_SIZE = 4096  # uniform draws generated at once for accept/reject
+
+# layout of one worker's slot in the shared progress list, see generate_indoors_fast
+PROGRESS_FIELDS = ("pid", "curr_loss", "curr_viol", "curr_iter", "max_iter")
+
+RANDOM_ACCEPTANCE_CHANCE = 0.01  # small chance to accept any soft-constraint move
+
+
+def demon_accept(
+    delta_energy: float, demon_energy: float, viol_diff: float, rand_u: float
+) -> typing.Tuple[bool, float]:
+    """
+    Scalar accept/reject decision of the demon algorithm
+
+    Returns whether the move is accepted, and the demon energy after the move
+    """
+
+    # checking condition for hard constrains
+    if viol_diff > 0:
+        return False, demon_energy
+    elif viol_diff < 0:
+        return True, demon_energy
+
+    # checking conditional for soft constrains, derived from microcanonical Monte Carlo simluation.
+    # In a Monte Carlo simluation, the energy required to flip a spin, delta_energy,
+    # is compared with demon_energy, if demon >= delta, flip accepted and demon-=delta
+    if demon_energy >= delta_energy or delta_energy <= 0:
+        return True, demon_energy - delta_energy
+
+    return rand_u < RANDOM_ACCEPTANCE_CHANCE, demon_energy
+
+
+@dataclass(slots=True)
+class StepStat:
+    curr_iteration: int
+    loss: float
+    viol: float
+    best_loss: float | None
+    demon_energy: float
+    demon_energy_max: float
+    reduction_factor: float
+    initial_demon_energy: float
+    initial_demon_energy_max: float
+    accept: bool | None
+    move_gen: str
+    move_type: str | None
+    move_target: str | None
+    move_dur: float
+    elapsed: float
+    retry: int | None
 
 
 @gin.configurable
@@ -42,10 +96,12 @@ class SimulatedAnnealingSolver:
         finetune_pct,
         checkpoint_best=False,
         output_folder=None,
-        queue=None,  # multiprocessing
+        progress_shm=None,  # multiprocessing, name of a ShareableList
+        progress_slot=0,
         visualize=False,
         print_report_freq=1,
         print_breakdown_freq=0,
+        print_breakdown_interactive_only=True,
         initial_demon_energy=100,
         initial_demon_energy_max=200,
         reduction_factor=0.85,
@@ -57,6 +113,9 @@ class SimulatedAnnealingSolver:
 
         self.print_report_freq = print_report_freq
         self.print_breakdown_freq = print_breakdown_freq
+        # breakdowns build several DataFrames, only worth it if someone is watching
+        if print_breakdown_interactive_only and not sys.stdout.isatty():
+            self.print_breakdown_freq = 0
 
         self.checkpoint_best = checkpoint_best
         if checkpoint_best:
@@ -71,21 +130,46 @@ class SimulatedAnnealingSolver:
         self.eval_memo = {}
         self.stats = []
 
-        self.queue = queue  # multiprocessing
+        # multiprocessing, latest progress is written in place for the listener to poll
+        # attached for the duration of each solve, see reset() and close_progress()
+        self.progress_shm = progress_shm
+        self.progress = None
+        self.progress_base = progress_slot * len(PROGRESS_FIELDS)
 
         # demon energy determines whether a move is accepted, demon energy max sets upper boundary
         self.demon_energy = initial_demon_energy
         self.demon_energy_max = initial_demon_energy_max
         self.initial_demon_energy = initial_demon_energy
         self.initial_demon_energy_max = initial_demon_energy_max
-        # reduce factor for demon energy max
+        # reduce factor for demon energy max, and reduction_factor**curr_iteration
         self.reduction_factor = reduction_factor
+        self._reduction_pow = 1.0
+
+        # reseeded by reset(), see _reseed_rng
+        self._rng = None
+        self._rand_buf = []
+        self._rand_idx = 0
+
+    def _reseed_rng(self):
+        # reset() runs inside each stage's FixedSeed, so seeding from the global state
+        # here keeps each stage's accept/reject draws independent of earlier stages
+        self._rng = np.random.default_rng(np.random.randint(2**31))
+        self._rand_buf = self._rng.random(RANDOM_BUFFER_SIZE).tolist()
+        self._rand_idx = 0
+
+    def _uniform(self) -> float:
+        if self._rand_idx == len(self._rand_buf):
+            self._rand_buf = self._rng.random(RANDOM_BUFFER_SIZE).tolist()
+            self._rand_idx = 0
+        u = self._rand_buf[self._rand_idx]
+        self._rand_idx += 1
+        return u
 
     def save_stats(self, path):
         if len(self.stats) == 0:
             return
 
-        df = pd.DataFrame.from_records(self.stats)
+        df = pd.DataFrame.from_records([asdict(s) for s in self.stats])
 
         logger.info(f"Saving stats {path}")
         df.to_csv(path)
@@ -104,13 +188,14 @@ class SimulatedAnnealingSolver:
         plt.savefig(figpath)
         plt.close()
 
-        logger.info(f"Total elapsed {path.stem} {self.stats[-1]['elapsed']:.2f}")
+        logger.info(f"Total elapsed {path.stem} {self.stats[-1].elapsed:.2f}")
 
     def reset(self, max_iters):
         self.curr_iteration = 0
         self.curr_result = None
         self.best_loss = None
         self.eval_memo = {}
+        self._next_gc_iteration = 0
 
         self.optim_start_time = time.perf_counter()
         self.max_iterations = max_iters
@@ -129,18 +214,49 @@ class SimulatedAnnealingSolver:
         # Initialize demon energy and max energy
         self.demon_energy = self.initial_demon_energy
         self.demon_energy_max = self.initial_demon_energy_max
+        self._reduction_pow = 1.0
+        self._reseed_rng()
+
+        if self.progress_shm is not None and self.progress is None:
+            self.progress = ShareableList(name=self.progress_shm)
+            self.progress[self.progress_base] = float(os.getpid())
+        if self.progress is not None:
+            # clear the previous stage's counters, max_iter first so the listener
+            # never sees a stale iteration against a fresh limit
+            self.progress[self.progress_base + 4] = 0.0
+            self.progress[self.progress_base + 3] = 0.0
 
         logger.debug(
             f"Reset solver with {max_iters=} {self.demon_energy=} {self.demon_energy_max=}"
         )
 
+    def close_progress(self):
+        if self.progress is not None:
+            self.progress.shm.close()
+            self.progress = None
+
+    def garbage_collect(self, elapsed):
+        # bpy.data is not thread safe, so gc stays on the main thread. instead, space
+        # collections out according to how expensive they are relative to a step
+        gc_start = time.perf_counter()
+        butil.garbage_collect(butil.get_all_bpy_data_targets())
+        gc_dur = time.perf_counter() - gc_start
+
+        step_dur = elapsed / (self.curr_iteration + 1)
+        interval = gc_dur / (BPY_GARBAGE_COLLECT_TIME_BUDGET * max(step_dur, 1e-6))
+        interval = min(
+            max(int(interval), BPY_GARBAGE_COLLECT_FREQUENCY),
+            BPY_GARBAGE_COLLECT_MAX_INTERVAL,
+        )
+        self._next_gc_iteration = self.curr_iteration + interval
+
     def checkpoint(self, state):
         filename = os.path.join(self.output_folder, "checkpoint_state.pkl")
         state.save(filename)
 
         if self.visualize:
             # save score plot
-            plt.plot(self.score_history)
+            plt.plot([s.loss for s in self.stats])
             plt.savefig(os.path.join(self.output_folder, "scores.png"))
             plt.close()
 
@@ -219,9 +335,8 @@ class SimulatedAnnealingSolver:
     ) -> typing.Tuple["Move", "evaluate.EvalResult", int]:
         move_gen = propose_func(consgraph, state, filter_domain, temp)
 
-        print("\nmove_gen: \n")
-        print(f"\ntype(move_gen): {type(move_gen)}\n")
-        logger.debug(f"\nmove_gen: {move_gen}\n")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"{move_gen=} {type(move_gen)=}")
 
         move = None
         retry = None
@@ -248,9 +363,9 @@ class SimulatedAnnealingSolver:
         return move, None, retry
 
     def curr_temp(self) -> float:
+        # plain python scalar math, numpy ufuncs are slow for single values
         temp = self.initial_temp * self.cooling_rate**self.curr_iteration
-        temp = np.clip(temp, self.final_temp, self.initial_temp)
-        return temp
+        return max(self.final_temp, min(temp, self.initial_temp))
 
     def metrop_hastings_with_viol(
         self, prop_result: "evaluate.EvalResult", temp: float
@@ -273,7 +388,7 @@ class SimulatedAnnealingSolver:
             return result
 
         # standard metropolis-hastings
-        rv = np.log(np.random.uniform())
+        rv = math.log(1.0 - self._uniform())  # uniform is in [0, 1), avoid log(0)
         result["accept"] = rv < log_prob
         return result
 
@@ -283,11 +398,7 @@ class SimulatedAnnealingSolver:
         return delta_energy
 
     def accept_move(self, delta_energy, prop_result):
-        prop_viol = prop_result.viol_count()
-        curr_viol = self.curr_result.viol_count()
-        viol_diff = prop_viol - curr_viol
-
-        random_acceptance_chance = 0.01
+        viol_diff = prop_result.viol_count() - self.curr_result.viol_count()
 
         result = {
             "delta_energy": delta_energy,
@@ -295,41 +406,17 @@ class SimulatedAnnealingSolver:
             "demon_energy_max": self.demon_energy_max,
         }
 
-        # checking condition for hard constrains
-        if viol_diff > 0:
-            result["accept"] = False
-            return result
-        elif viol_diff < 0:
-            result["accept"] = True
-            return result
-
-        # checking conditional for soft constrains
-        if (
-            self.demon_energy >= delta_energy or delta_energy <= 0
-        ):  # derived from microcanonical Monte Carlo simluation
-            """
-                In a Monte Carlo simluation, the energy required to flip a spin, delta_energy, 
-                is compared with demon_energy, if demon >= delta, flip accepted and demon-=delta 
-            """
-            self.demon_energy -= delta_energy
-            # self.demon_energy = min(self.demon_energy, self.demon_energy_max)
-            result["accept"] = True
-            return result
-        elif (
-            random.uniform(0, 1) < random_acceptance_chance
-        ):  # small chance to accept any moves
-            result["accept"] = True
-            return result
-        else:
-            result["accept"] = False
-            return result
+        result["accept"], self.demon_energy = demon_accept(
+            delta_energy, self.demon_energy, viol_diff, self._uniform()
+        )
+        return result
 
     def update_demon_energy_max(self):
         # self.demon_energy_max *= self.reduction_factor
-        # demon energy max decreases exponentially
-        self.demon_energy_max = self.initial_demon_energy_max * (
-            self.reduction_factor**self.curr_iteration
-        )
+        # demon energy max decreases exponentially, tracked incrementally rather
+        # than recomputing reduction_factor**curr_iteration every step
+        self.demon_energy_max = self.initial_demon_energy_max * self._reduction_pow
+        self._reduction_pow *= self.reduction_factor
         # reset demon energy to equal or below demon energy max
         if self.demon_energy > self.demon_energy_max:
             self.demon_energy = self.demon_energy_max
@@ -418,16 +505,13 @@ class SimulatedAnnealingSolver:
             # )
 
             # multiprocessing
-            if self.queue is not None:
-                self.queue.put(
-                    {
-                        "pid": os.getpid(),
-                        "curr_loss": loss,
-                        "curr_viol": viol,
-                        "curr_iter": iter,
-                        "max_iter": self.max_iterations,
-                    }
-                )
+            if self.progress is not None:
+                base = self.progress_base
+                # counters first, the listener only judges loss once max_iter is set
+                self.progress[base + 3] = float(iter)
+                self.progress[base + 4] = float(self.max_iterations)
+                self.progress[base + 1] = float(loss)
+                self.progress[base + 2] = float(viol)
 
             logger.info(
                 f"it={self.curr_iteration}/{self.max_iterations} {dt=:.3f} {n=} "
@@ -438,10 +522,10 @@ class SimulatedAnnealingSolver:
 
         if is_log_step:
             self.stats.append(
-                dict(
+                StepStat(
                     curr_iteration=self.curr_iteration,
-                    loss=self.curr_result.loss(),
-                    viol=self.curr_result.viol_count(),
+                    loss=loss,
+                    viol=viol,
                     best_loss=self.best_loss,
                     # temp=temp,
                     demon_energy=self.demon_energy,
@@ -489,8 +573,8 @@ class SimulatedAnnealingSolver:
 
             print(df)
 
-        if self.curr_iteration % BPY_GARBAGE_COLLECT_FREQUENCY == 0:
-            butil.garbage_collect(butil.get_all_bpy_data_targets())
+        if self.curr_iteration >= self._next_gc_iteration:
+            self.garbage_collect(elapsed)
 
         if self.curr_iteration != 0 and self.curr_iteration % 50 == 0:
             print(f"CLUTTER REPORT {self.curr_iteration=}")
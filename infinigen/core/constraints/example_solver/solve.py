@@ -6,7 +6,6 @@
 
 import copy
 import logging
-from multiprocessing import Process, Queue  # noqa: F401
 from pathlib import Path
 
 import bpy
@@ -55,13 +54,19 @@ class LinearDecaySchedule:
 
 @gin.configurable
 class Solver:
-    def __init__(self, output_folder: Path, queue: Queue = None):
+    def __init__(
+        self, output_folder: Path, progress_shm: str = None, progress_slot: int = 0
+    ):
         """Initialize the solver
 
         Parameters
         ----------
         output_folder : Path
             The folder to save output plots to
+        progress_shm : str | None
+            Name of a shared ShareableList the optimizer writes its progress into
+        progress_slot : int
+            Which slot of `progress_shm` belongs to this solver
         print_report_freq : int
             How often to print loss reports
         multistory : bool
@@ -76,7 +81,8 @@ class Solver:
 
         self.optim = SimulatedAnnealingSolver(
             output_folder=output_folder,
-            queue=queue,
+            progress_shm=progress_shm,
+            progress_slot=progress_slot,
         )
         self.room_solver_fn = FloorPlanSolver
         self.state: State = None
@@ -186,9 +192,12 @@ class Solver:
 
         self.optim.reset(max_iters=n_steps)
         ra = trange(n_steps) if self.optim.print_report_freq == 0 else range(n_steps)
-        for j in ra:
-            move_gen = self.choose_move_type(moves, j, n_steps)
-            self.optim.step(consgraph, self.state, move_gen, filter_domain, j)
+        try:
+            for j in ra:
+                move_gen = self.choose_move_type(moves, j, n_steps)
+                self.optim.step(consgraph, self.state, move_gen, filter_domain, j)
+        finally:
+            self.optim.close_progress()
 
         logger.info(
             f"Finished solving {desc_full}, added {len(self.state.objs) - n_start} "
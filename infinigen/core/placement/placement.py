@@ -25,17 +25,51 @@ from .factory import AssetFactory
 
 logger = logging.getLogger(__name__)
 
+_ASSET_NAME_RE = re.compile(r"(.*)\((\d+)\)\..*_(.*)\((\d+)\)")
+_PLACEHOLDER_COL_RE = re.compile(r"placeholders:((.*)\((\d*)\))")
+
+_CUBE_CORNERS = np.stack(np.meshgrid(*[[-1, 1]] * 3), axis=-1).reshape(-1, 3)
+
+# classname -> [(col, full_repr, fac_seed)], see _placeholder_collections
+_placeholder_cols_by_class = None
+
+# reused by placeholder_locs, creating and deleting an object per call is expensive
+_scratch_vert = None
+
 
 def objects_to_grid(objects, spacing):
     rowsize = np.round(np.sqrt(len(objects)))
-    for i, o in enumerate(objects):
-        o.location += spacing * mathutils.Vector((i % rowsize, i // rowsize, 0))
+    i = np.arange(len(objects))
+    offsets = spacing * np.stack([i % rowsize, i // rowsize], axis=-1)
+    for o, (dx, dy) in zip(objects, offsets.tolist()):
+        o.location.x += dx
+        o.location.y += dy
+
+
+def _get_scratch_vert():
+    global _scratch_vert
+
+    try:
+        valid = _scratch_vert is not None and _scratch_vert.name is not None
+    except ReferenceError:  # removed from bpy.data, e.g. by a scene reset
+        valid = False
+
+    if not valid:
+        _scratch_vert = butil.spawn_vert("compute_placeholder_locations (no gc)")
+        return _scratch_vert
+
+    _scratch_vert.data.clear_geometry()
+    _scratch_vert.data.vertices.add(1)
+    scene_objs = bpy.context.scene.collection.objects
+    if _scratch_vert.name not in scene_objs:
+        scene_objs.link(_scratch_vert)
+    return _scratch_vert
 
 
 def placeholder_locs(
     terrain, overall_density, selection, distance_min=0, altitude=0.0, max_locs=None
 ):
-    temp_vert = butil.spawn_vert("compute_placeholder_locations")
+    temp_vert = _get_scratch_vert()
     geo = temp_vert.modifiers.new(name="GEOMETRY", type="NODES")
     if geo.node_group is None:
         group = geometry_node_group_empty_new()
@@ -64,11 +98,13 @@ def placeholder_locs(
 
     # dump the point locations out as vertices
     butil.apply_modifiers(temp_vert, geo)
-    locations = np.array(
-        [temp_vert.matrix_world @ v.co for v in temp_vert.data.vertices]
-    )
+    verts = np.empty((len(temp_vert.data.vertices), 3), dtype=np.float32)
+    temp_vert.data.vertices.foreach_get("co", verts.reshape(-1))
+    locations = butil.apply_matrix_world(temp_vert, verts)
 
-    butil.delete(temp_vert)
+    # keep the scratch object around for the next call, but empty and out of the scene
+    temp_vert.data.clear_geometry()
+    bpy.context.scene.collection.objects.unlink(temp_vert)
 
     np.random.shuffle(locations)
 
@@ -77,18 +113,26 @@ def placeholder_locs(
 
 def points_near_camera(cam, scene_bvh, n, alt, dist_range):
     points = []
+    down = mathutils.Vector((0, 0, -1))
+    cam_loc = np.array(cam.location)
 
     while len(points) < n:
-        rad = np.random.uniform(*dist_range)
-        angle = np.deg2rad(np.random.uniform(0, 360))
-        off = rad * mathutils.Vector((np.cos(angle), np.sin(angle), 0))
-        pos = cam.location + off
+        # draw candidates in batches, only the ray casts need to happen per point
+        batch = 2 * (n - len(points))
+        rads = np.random.uniform(*dist_range, size=batch)
+        angles = np.random.uniform(0, 2 * np.pi, size=batch)
+        offs = np.stack(
+            [rads * np.cos(angles), rads * np.sin(angles), np.zeros(batch)], axis=-1
+        )
 
-        pos, *_ = scene_bvh.ray_cast(pos, mathutils.Vector((0, 0, -1)))
-        if pos is None:
-            continue
-        pos.z += alt
-        points.append(pos)
+        for pos in cam_loc + offs:
+            pos, *_ = scene_bvh.ray_cast(pos, down)
+            if pos is None:
+                continue
+            pos.z += alt
+            points.append(pos)
+            if len(points) == n:
+                break
 
     return np.array(points)
 
@@ -119,30 +163,31 @@ def scatter_placeholders_mesh(
 def scatter_placeholders(locations, factory: AssetFactory):
     logger.info(f"Placing {len(locations)} placeholders for {factory}")
     objs = []
-    for i, loc in enumerate(tqdm(locations)):
-        rot_z = np.random.uniform(0, 2 * np.pi)
+    # spawn_placeholder runs under FixedSeed, so drawing upfront gives the same rotations
+    rots_z = np.random.uniform(0, 2 * np.pi, size=len(locations)).tolist()
+    for i, (loc, rot_z) in enumerate(zip(tqdm(locations), rots_z)):
         obj = factory.spawn_placeholder(i, loc, mathutils.Euler((0, 0, rot_z)))
         objs.append(obj)
     col = butil.group_in_collection(objs, "placeholders:" + repr(factory))
+    invalidate_placeholder_collections()
     factory.finalize_placeholders(objs)
     return col
 
 
 def get_placeholder_points(obj: bpy.types.Object) -> np.ndarray:
     if obj.type == "MESH":
-        verts = np.zeros((len(obj.data.vertices), 3))
+        verts = np.empty((len(obj.data.vertices), 3), dtype=np.float32)
         obj.data.vertices.foreach_get("co", verts.reshape(-1))
         return butil.apply_matrix_world(obj, verts)
     elif obj.type == "EMPTY" and obj.empty_display_type == "CUBE":
-        extent = obj.empty_display_size * np.array([-1, 1])
-        verts = np.stack(np.meshgrid(extent, extent, extent), axis=-1)
+        verts = obj.empty_display_size * _CUBE_CORNERS
         return butil.apply_matrix_world(obj, verts)
     else:
         return np.array([obj.matrix_world.translation]).reshape(1, 3)
 
 
 def parse_asset_name(name):
-    match = re.fullmatch("(.*)\((\d+)\)\..*_(.*)\((\d+)\)", name)
+    match = _ASSET_NAME_RE.fullmatch(name)
     if not match:
         return None, None, None, None
     return list(match.groups())
@@ -266,6 +311,39 @@ def populate_collection(
     return all_objs, updated_pholders
 
 
+@bpy.app.handlers.persistent
+def invalidate_placeholder_collections(*_):
+    global _placeholder_cols_by_class
+    _placeholder_cols_by_class = None
+
+
+# loading a .blend replaces every collection, drop the index along with them
+bpy.app.handlers.load_post.append(invalidate_placeholder_collections)
+
+
+def _placeholder_collections(classname: str):
+    """
+    Placeholder collections produced by factories named classname.
+
+    Built with a single scan of bpy.data.collections, and only rebuilt once
+    scatter_placeholders adds a placeholder collection or a .blend is loaded
+    """
+
+    global _placeholder_cols_by_class
+
+    if _placeholder_cols_by_class is None:
+        _placeholder_cols_by_class = {}
+        for col in bpy.data.collections:
+            if not (match := _PLACEHOLDER_COL_RE.fullmatch(col.name)):
+                continue
+            full_repr, name, fac_seed = match.groups()
+            _placeholder_cols_by_class.setdefault(name, []).append(
+                (col, full_repr, fac_seed)
+            )
+
+    return list(_placeholder_cols_by_class.get(classname, []))
+
+
 @gin.configurable
 def populate_all(
     factory_class: type,
@@ -284,14 +362,7 @@ def populate_all(
     """
 
     results = []
-    for col in bpy.data.collections:
-        if not (match := re.fullmatch("placeholders:((.*)\((\d*)\))", col.name)):
-            continue
-        full_repr, classname, fac_seed = match.groups()
-
-        if classname != factory_class.__name__:
-            continue
-
+    for col, full_repr, fac_seed in _placeholder_collections(factory_class.__name__):
         asset_target_col = butil.get_collection(f"unique_assets:{full_repr}")
         asset_target_col.hide_viewport = False
 
@@ -321,17 +392,22 @@ def make_placeholders_float(placeholder_col, scene_bvh, water):
     deps = bpy.context.evaluated_depsgraph_get()
     water_bvh = mathutils.bvhtree.BVHTree.FromObject(water, deps)
     up = mathutils.Vector((0, 0, 1))
-    margin = mathutils.Vector((0, 0, 1e-3))
 
-    for p in tqdm(
-        placeholder_col.objects,
-        desc=f"Computing fluid-floating locations for {placeholder_col.name=}",
+    # batch the scalar work, only the BVH ray casts happen per placeholder
+    objs = list(placeholder_col.objects)
+    locs = np.array([p.location for p in objs]).reshape(-1, 3)
+    origins = locs + np.array([0, 0, 1e-3])
+    z_randoms = np.random.uniform(size=len(objs)).tolist()
+
+    desc = f"Computing fluid-floating locations for {placeholder_col.name=}"
+    for p, z_start, origin, z_rand in zip(
+        tqdm(objs, desc=desc), locs[:, 2].tolist(), origins, z_randoms
     ):
-        w_up, *_ = water_bvh.ray_cast(p.location + margin, up)
+        w_up, *_ = water_bvh.ray_cast(origin, up)
         if w_up is not None:
-            t_up, *_ = scene_bvh.ray_cast(p.location + margin, up)
+            t_up, *_ = scene_bvh.ray_cast(origin, up)
             z = min(w_up.z, t_up.z) if t_up is not None else w_up.z
             z = max(
-                p.location.z, z - 0.7
+                z_start, z - 0.7
             )  # the origin will be the creature's foot, allow some space for the rest of it
-            p.location.z = np.random.uniform(p.location.z, z)
+            p.location.z = z_start + z_rand * (z - z_start)
@@ -22,7 +22,6 @@ from tqdm import tqdm
 
 from infinigen.core.nodes.node_info import DATATYPE_DIMS, DATATYPE_FIELDS
 
-from . import math as mutil
 from .logging import Suppress
 
 logger = logging.getLogger(__name__)
@@ -957,7 +956,9 @@ def parent_to(
 
 
 def apply_matrix_world(obj, verts: np.array):
-    return mutil.dehomogenize(mutil.homogenize(verts) @ np.array(obj.matrix_world).T)
+    # object world matrices are affine, so skip homogenizing the (potentially large) verts
+    m = np.array(obj.matrix_world)
+    return verts @ m[:3, :3].T + m[:3, 3]
 
 
 def surface_area(obj: bpy.types.Object):
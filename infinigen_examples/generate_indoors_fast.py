@@ -3,6 +3,7 @@
 # of this source tree.
 
 import argparse
+import functools
 import logging
 from pathlib import Path
 
@@ -17,7 +18,8 @@ logging.basicConfig(
 import os
 import signal
 import time
-from multiprocessing import Process, Queue  # noqa: F401
+from multiprocessing import Event, Process
+from multiprocessing.shared_memory import ShareableList
 
 import gin
 import numpy as np
@@ -34,6 +36,9 @@ from infinigen.core.constraints.example_solver import (
     populate,
     state_def,
 )
+from infinigen.core.constraints.example_solver.annealing_testOptiP import (
+    PROGRESS_FIELDS,
+)
 from infinigen.core.constraints.example_solver.room import decorate as room_dec
 from infinigen.core.constraints.example_solver.solve import Solver
 from infinigen.core.util import blender as butil
@@ -134,7 +139,11 @@ all_vars = [cu.variable_room, cu.variable_obj]
 
 @gin.configurable
 def compose_indoors(
-    output_folder: Path, scene_seed: int, queue: Queue = None, **overrides
+    output_folder: Path,
+    scene_seed: int,
+    progress_shm: str = None,
+    progress_slot: int = 0,
+    **overrides,
 ):
     p = pipeline.RandomStageExecutor(scene_seed, output_folder, overrides)
 
@@ -184,7 +193,11 @@ def compose_indoors(
         logger.info(f"Restricting to {restrict_parent_rooms}")
         apply_greedy_restriction(stages, restrict_parent_rooms, cu.variable_room)
 
-    solver = Solver(output_folder=output_folder, queue=queue)
+    solver = Solver(
+        output_folder=output_folder,
+        progress_shm=progress_shm,
+        progress_slot=progress_slot,
+    )
 
     def solve_rooms():
         scene_seed = 0000000000
@@ -515,11 +528,11 @@ def info(title):
     logger.info("process id:", os.getpid())
 
 
-def exec_main(args, seed, queue):
+def exec_main(args, seed, progress_shm=None, progress_slot=0):
     info("main function")
     execute_tasks.main(
-        compose_scene_func=lambda output_folder, scene_seed, **kwargs: compose_indoors(
-            output_folder, scene_seed, queue=queue, **kwargs
+        compose_scene_func=functools.partial(
+            compose_indoors, progress_shm=progress_shm, progress_slot=progress_slot
         ),
         # compose_scene_func=compose_indoors,
         populate_scene_func=None,
@@ -532,36 +545,52 @@ def exec_main(args, seed, queue):
 
 
 # listener func to contineuously listen to loss and violation
-def listener(queue, iter_fraction=0.8, min_loss=20):
+def listener(
+    progress_shm, num_slots, done, iter_fraction=0.8, min_loss=20, poll_interval=0.5
+):
     info("listener")
-    while True:
+    progress = ShareableList(name=progress_shm)
+    n_fields = len(PROGRESS_FIELDS)
+    last_seen = [None] * num_slots
+    killed = set()
+    while not done.wait(poll_interval):
         try:
-            data = queue.get()
-            if data == "DONE":
-                break
-            pid = data["pid"]
-            curr_loss = data["curr_loss"]
-            curr_viol = data["curr_viol"]
-            curr_iter = data["curr_iter"]
-            max_iter = data["max_iter"]
-            logger.info(f"Process={pid}")
-            logger.info(f"curr loss={curr_loss}")
-            logger.info(f"curr viol={curr_viol}")
-            logger.info(f"curr iter={curr_iter}")
-            logger.info(f"max iter={max_iter}")
-
-            limit_iter = max_iter * iter_fraction
-            if curr_iter >= limit_iter:
-                logger.info(f"reached limit iteration: {limit_iter}")
-                if curr_loss > min_loss:
-                    logger.info(f"\n\nkilling process {pid}\n")
-                    logger.info(f"current loss is: {curr_loss}\n")
-                    logger.info(f"exceed min loss: {min_loss}\n\n")
-                    os.kill(pid, signal.SIGTERM)
+            for slot in range(num_slots):
+                base = slot * n_fields
+                # ShareableList does not support slicing, read field by field
+                values = [progress[base + k] for k in range(n_fields)]
+                data = dict(zip(PROGRESS_FIELDS, values))
+                pid = int(data["pid"])
+                # pid 0 means the slot is unclaimed or its seed has finished
+                if pid == 0 or pid in killed or data == last_seen[slot]:
+                    continue
+                last_seen[slot] = data
+
+                curr_loss = data["curr_loss"]
+                curr_viol = data["curr_viol"]
+                curr_iter = data["curr_iter"]
+                max_iter = data["max_iter"]
+                logger.info(f"Process={pid}")
+                logger.info(f"curr loss={curr_loss}")
+                logger.info(f"curr viol={curr_viol}")
+                logger.info(f"curr iter={curr_iter}")
+                logger.info(f"max iter={max_iter}")
+
+                limit_iter = max_iter * iter_fraction
+                if max_iter > 0 and curr_iter >= limit_iter:
+                    logger.info(f"reached limit iteration: {limit_iter}")
+                    if curr_loss > min_loss:
+                        logger.info(f"\n\nkilling process {pid}\n")
+                        logger.info(f"current loss is: {curr_loss}\n")
+                        logger.info(f"exceed min loss: {min_loss}\n\n")
+                        os.kill(pid, signal.SIGTERM)
+                        killed.add(pid)
 
         except Exception as e:
             logger.error(f"Listener encountered an error: {e}")
 
+    progress.shm.close()
+
 
 def main(args, parallel=True):
     logger.info(f"\n\nargs.seed: {args.seed} type: {type(args.seed)}\n\n")
@@ -593,21 +622,35 @@ def main(args, parallel=True):
         ],
     )
     if parallel:
-        processes = []
-        queue = Queue()
-        listener_process = Process(target=listener, args=(queue,))
+        # each seed's solver writes its latest progress into its own slot of a
+        # shared list, which the listener polls. no pickling or locking per update
+        n_fields = len(PROGRESS_FIELDS)
+        progress = ShareableList([0.0] * n_fields * len(scene_seed))
+        done = Event()
+        listener_process = Process(
+            target=listener, args=(progress.shm.name, len(scene_seed), done)
+        )
         listener_process.start()
-        for i, seed in enumerate(scene_seed):
-            process = Process(target=exec_main, args=(args, seed, queue))
+
+        # one process per seed. a scene takes minutes, so spawn cost is negligible,
+        # and the listener can abort a bad seed by simply killing its process
+        processes = []
+        for slot, seed in enumerate(scene_seed):
+            process = Process(
+                target=exec_main, args=(args, seed, progress.shm.name, slot)
+            )
             logger.info(f"seed: {seed}")
             processes.append(process)
             process.start()
 
-        for process in processes:
+        for slot, process in enumerate(processes):
             process.join()
+            progress[slot * n_fields] = 0.0  # release the slot, see listener
 
-        queue.put("DONE")
+        done.set()
         listener_process.join()
+        progress.shm.close()
+        progress.shm.unlink()
 
     else:
         exec_main(args, scene_seed)
@@ -0,0 +1,51 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory
+# of this source tree.
+
+import signal
+import threading
+import time
+from multiprocessing import Process
+from multiprocessing.shared_memory import ShareableList
+
+from infinigen.core.constraints.example_solver.annealing_testOptiP import (
+    PROGRESS_FIELDS,
+)
+from infinigen_examples.generate_indoors_fast import listener
+
+
+def test_listener_kills_stalled_solve():
+    n_fields = len(PROGRESS_FIELDS)
+    progress = ShareableList([0.0] * n_fields * 2)
+    stalled = Process(target=time.sleep, args=(30,))
+    healthy = Process(target=time.sleep, args=(30,))
+    stalled.start()
+    healthy.start()
+
+    done = threading.Event()
+    thread = threading.Thread(
+        target=listener,
+        args=(progress.shm.name, 2, done),
+        kwargs=dict(iter_fraction=0.8, min_loss=20, poll_interval=0.05),
+    )
+    try:
+        # past the iteration limit with a high loss
+        for k, v in enumerate([stalled.pid, 100.0, 0.0, 90.0, 100.0]):
+            progress[k] = v
+        # past the iteration limit but already converged
+        for k, v in enumerate([healthy.pid, 5.0, 0.0, 90.0, 100.0]):
+            progress[n_fields + k] = v
+
+        thread.start()
+        stalled.join(timeout=10)
+        assert stalled.exitcode == -signal.SIGTERM
+        assert healthy.is_alive()
+    finally:
+        done.set()
+        if thread.is_alive():
+            thread.join()
+        for p in (stalled, healthy):
+            p.terminate()
+            p.join()
+        progress.shm.close()
+        progress.shm.unlink()
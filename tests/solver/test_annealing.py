@@ -0,0 +1,49 @@
+# Copyright (C) 2024, Princeton University.
+# This source code is licensed under the BSD 3-Clause license found in the LICENSE file in the root directory
+# of this source tree.
+
+import pytest
+
+from infinigen.core.constraints.example_solver.annealing_testOptiP import (
+    SimulatedAnnealingSolver,
+    demon_accept,
+)
+
+
+@pytest.mark.parametrize(
+    "delta_energy, demon_energy, viol_diff, rand_u, expected",
+    [
+        (-5, 10, 1, 0.0, (False, 10)),  # more violations always rejected
+        (50, 10, -1, 0.9, (True, 10)),  # fewer violations always accepted
+        (-5, 0, 0, 0.9, (True, 5)),  # improvement feeds the demon
+        (0, 0, 0, 0.9, (True, 0)),
+        (5, 10, 0, 0.9, (True, 5)),  # demon pays for the move
+        (10, 10, 0, 0.9, (True, 0)),
+        (15, 10, 0, 0.0, (True, 10)),  # random acceptance
+        (15, 10, 0, 0.9, (False, 10)),
+    ],
+)
+def test_demon_accept(delta_energy, demon_energy, viol_diff, rand_u, expected):
+    res = demon_accept(delta_energy, demon_energy, viol_diff, rand_u)
+    assert res == expected
+
+
+def test_demon_energy_max_decay():
+    solver = SimulatedAnnealingSolver(
+        max_invalid_candidates=5,
+        initial_temp=1,
+        final_temp=0.01,
+        finetune_pct=0.1,
+        initial_demon_energy=100,
+        initial_demon_energy_max=200,
+        reduction_factor=0.85,
+    )
+
+    for n_iters in [30, 10]:
+        solver.reset(max_iters=n_iters)
+        for i in range(n_iters):
+            solver.curr_iteration = i
+            solver.update_demon_energy_max()
+            expected = solver.initial_demon_energy_max * solver.reduction_factor**i
+            assert solver.demon_energy_max == pytest.approx(expected)
+            assert solver.demon_energy <= solver.demon_energy_max